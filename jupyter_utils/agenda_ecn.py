@@ -1,16 +1,44 @@
 # Import necessary libraries
+import numpy as np
 import pandas as pd
 from icalendar import Calendar, Event
-from datetime import datetime, time
+from datetime import date, datetime, time
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 import calendar
-import pytz
+import functools
+import mmap
+import os
 import openpyxl
+from openpyxl.utils import column_index_from_string
 import re
+try:
+    import ahocorasick # optional, speeds up multi-course indexing
+except ImportError:
+    ahocorasick = None
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_UTC = ZoneInfo('UTC')
+_PARIS = ZoneInfo('Europe/Paris')
+
+# raw ICS components, see read_upcoming_ics
+_VEVENT_RE = re.compile(rb'BEGIN:VEVENT.*?END:VEVENT', re.S)
+_VTIMEZONE_RE = re.compile(rb'BEGIN:VTIMEZONE.*?END:VTIMEZONE', re.S)
+_DTSTART_RE = re.compile(rb'^DTSTART[^:\r\n]*:(\d{8})', re.M)
+
+# start and end times of the class slots in ECN schedules
+_CLASS_SLOTS = {"M1": (time( 8, 0), time(10, 0)),
+                "M2": (time(10,15), time(12,15)),
+                "S1": (time(13,45), time(15,45)),
+                "S2": (time(16, 0), time(18, 0))}
 
 def read_ics(file_path: str):
     """
     Reads and parses an ICS (iCalendar) file, extracting event details into a DataFrame.
+
+    Only upcoming events are kept. Events that are clearly past (starting before yesterday) are dropped 
+    from the raw file before parsing, so that long calendar histories are not parsed for nothing.
     
     Parameters:
     file_path (str): The path to the ICS file.
@@ -18,50 +46,88 @@ def read_ics(file_path: str):
     Returns:
     pd.DataFrame: A DataFrame containing the event details, including 'summary', 'dtstart', 'dtend', 'location', and 'description'.
     """
-    with open(file_path, 'r') as file:
-        gcal = Calendar.from_ical(file.read())
+    gcal = Calendar.from_ical(read_upcoming_ics(file_path))
         
-    utc=pytz.UTC
-    now = datetime.now().replace(tzinfo=utc)
-    events = []
+    now = datetime.now(_UTC)
+    # event details are gathered column by column
+    summaries, starts, ends, locations, descriptions = [], [], [], [], []
     
-    for component in gcal.walk():
-        if component.name == "VEVENT":
-           # try:
-                # Extract start time and ensure it's a datetime object with timezone info
-                dtstart=component.get('dtstart').dt
-                if isinstance(dtstart, datetime):
-                    if not dtstart.tzinfo:
-                        dtstart = dtstart.replace(tzinfo=pytz.UTC)
-                else:  # if dtstart is a date object
-                    dtstart = datetime.combine(dtstart, time.min, tzinfo=pytz.UTC)
-                # Skip events that are in the past
-                if dtstart < now:
-                    continue
-                
-                # Extract end time and ensure it's a datetime object with timezone info
-                dtend = component.get('dtend').dt
-                if isinstance(dtend, datetime):
-                    if not dtend.tzinfo:
-                            dtend = dtend.replace(tzinfo=pytz.UTC)
-                else:  # if dtend is a date object
-                    dtend = datetime.combine(dtend, time.max, tzinfo=pytz.UTC)
-                
-
-                event = {
-                    'summary': component.get('summary'),
-                    'dtstart': dtstart,
-                    'dtend': dtend,
-                    'location': component.get('location'),
-                    'description': component.get('description')
-                }
-                events.append(event)
-            #except:
-            #    print("Data ingnored: some error occured in:", component)
-
-        # Filter events to only include those after now
-    return pd.DataFrame(events)
+    for component in gcal.walk("VEVENT"):
+        # Extract start and end times, date objects are converted to UTC datetime
+        # (naive datetimes are considered UTC when converting columns)
+        dtstart = component.get('dtstart').dt
+        if not isinstance(dtstart, datetime):
+            dtstart = datetime.combine(dtstart, time.min, tzinfo=_UTC)
+        dtend = component.get('dtend').dt
+        if not isinstance(dtend, datetime):
+            dtend = datetime.combine(dtend, time.max, tzinfo=_UTC)
+
+        summaries.append(component.get('summary'))
+        starts.append(dtstart)
+        ends.append(dtend)
+        locations.append(component.get('location'))
+        descriptions.append(component.get('description'))
+
+    events = pd.DataFrame({'summary': summaries,
+                           'dtstart': pd.to_datetime(starts, utc=True),
+                           'dtend': pd.to_datetime(ends, utc=True),
+                           'location': locations,
+                           'description': descriptions})
+
+    # Filter events to only include those after now
+    return events[events['dtstart'] >= now].reset_index(drop=True)
+
+
+def read_upcoming_ics(file_path: str, since: date=None) -> bytes:
+    r"""
+    Reads an ICS (iCalendar) file, dropping the events that start before a given date without parsing them.
+
+    The file is memory-mapped and each VEVENT block is only scanned for its DTSTART date. 
+    The calendar header and time zone definitions are kept, as well as events whose start date cannot be read.
 
+    Parameters:
+    file_path (str): The path to the ICS file.
+    since (datetime.date): Events starting before this date are dropped. Defaults to yesterday, 
+        which keeps any event that may still be upcoming whatever its time zone.
+
+    Returns:
+    bytes: The filtered calendar, to be parsed with Calendar.from_ical.
+
+    Example:
+    An empty calendar and a calendar of past events only both give an empty calendar, 
+    also when the file starts with a UTF-8 BOM or a blank line:
+    >>> import tempfile
+    >>> header = b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//example//EN\r\n"
+    >>> past_event = b"BEGIN:VEVENT\r\nSUMMARY:Past\r\nDTSTART:20000101T080000Z\r\nDTEND:20000101T100000Z\r\nEND:VEVENT\r\n"
+    >>> for prefix, events in ((b"", b""), (b"", past_event), (b"\xef\xbb\xbf", past_event), (b"\r\n", b"")):
+    ...     with tempfile.NamedTemporaryFile(suffix=".ics", delete=False) as file:
+    ...         _ = file.write(prefix + header + events + b"END:VCALENDAR\r\n")
+    ...     print(read_upcoming_ics(file.name) == header + b"END:VCALENDAR\r\n", len(read_ics(file.name)))
+    ...     os.remove(file.name)
+    True 0
+    True 0
+    True 0
+    True 0
+    """
+    if since is None:
+        since = date.today() - timedelta(days=1)
+    since = since.strftime('%Y%m%d').encode()
+
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # VCALENDAR properties, without any leading BOM or blank lines
+        header_start = max(data.find(b'BEGIN:VCALENDAR'), 0)
+        header_end = data.find(b'BEGIN:', header_start + 1)
+        if header_end == -1: # no components at all
+            header_end = data.rfind(b'END:VCALENDAR')
+        parts = [data[header_start:header_end].rstrip()]
+        parts += [block.group() for block in _VTIMEZONE_RE.finditer(data)]
+        for block in _VEVENT_RE.finditer(data):
+            dtstart = _DTSTART_RE.search(block.group())
+            if dtstart and dtstart.group(1) < since:
+                continue
+            parts.append(block.group())
+    parts.append(b'END:VCALENDAR\r\n')
+    return b'\r\n'.join(parts)
 
 def create_merged_cell_lookup(sheet) -> dict:
     """
@@ -92,7 +158,8 @@ def unmerge_cell_copy_top_value(workbook_path: str, output_save="", verbose: boo
     
     This function opens the workbook at the given path, processes each worksheet by unmerging all merged cells,
     and copies the value of the top-left cell in each merged range to all cells in that range. The modified workbook
-    is saved as "ready4Import.xlsx" in the current working directory.
+    is saved to output_save if requested. When the values are only read, prefer read_unmerged_values which does 
+    not load the full workbook in memory.
 
     Args:
         workbook_path (str): The path to the Excel workbook to process.
@@ -112,28 +179,151 @@ def unmerge_cell_copy_top_value(workbook_path: str, output_save="", verbose: boo
             min_col, min_row, max_col, max_row = openpyxl.utils.range_boundaries(str(cell_group))
             sheet.unmerge_cells(str(cell_group))
             if verbose: print(min_col, min_row, max_col, max_row)
-            for row in sheet.iter_rows(min_col=min_col, min_row=min_row, max_col=max_col, max_row=max_row):
-                if verbose :print(lookup[cell_group])
-                for cell in row:
-                    cell.value = lookup[cell_group]
-                    if verbose: print(cell.coordinate)
+            top_left_cell_value = lookup[cell_group]
+            if verbose :print(top_left_cell_value)
+            # direct cell access, no iter_rows generator nor row tuples
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    sheet.cell(row=row, column=col, value=top_left_cell_value)
     if output_save : 
         wbook.save(output_save)
     return wbook
 
+def load_workbook_ro(workbook_path: str):
+    """
+    Opens a workbook in read-only mode, for processing that never modifies it.
+
+    Read-only workbooks are streamed from the xlsx archive instead of being fully materialized in memory, 
+    which keeps memory usage nearly constant and is much faster on large files. Formulas are read as their 
+    cached values and external links are not loaded.
+
+    Args:
+        workbook_path (str): The path to the Excel workbook to open.
+
+    Returns:
+        openpyxl.workbook.workbook.Workbook: The read-only workbook object. It should be closed after use.
+    """
+    return openpyxl.load_workbook(workbook_path, read_only=True, data_only=True, keep_links=False)
+
+def read_sheet_values(sheet):
+    """
+    Reads the non-empty cell values and the merged cell ranges of a read-only worksheet in a single pass.
+
+    Read-only worksheets do not expose their merged cells, they are collected by the sheet parser 
+    once all the rows have been streamed. This relies on openpyxl internals, which are only accessed here: 
+    if they change, read_unmerged_values falls back to the public API.
+
+    Args:
+        sheet (openpyxl.worksheet._read_only.ReadOnlyWorksheet): The worksheet object to process.
+
+    Returns:
+        tuple: A dictionary mapping (row, column) to cell values, and the list of merged cell ranges (as strings).
+    """
+    from openpyxl.worksheet._reader import WorkSheetParser
+
+    wbook = sheet.parent
+    values = {}
+    with sheet._get_source() as src:
+        parser = WorkSheetParser(src, sheet._shared_strings,
+                                 data_only=True,
+                                 epoch=wbook.epoch,
+                                 date_formats=wbook._date_formats,
+                                 timedelta_formats=wbook._timedelta_formats)
+        for row_idx, row in parser.parse():
+            for cell in row:
+                if cell['value'] is not None:
+                    values[(row_idx, cell['column'])] = cell['value']
+    merged_ranges = []
+    if parser.merged_cells:
+        merged_ranges = [str(cell_group.ref) for cell_group in parser.merged_cells.mergeCell]
+    return values, merged_ranges
+
+def read_unmerged_values(workbook_path: str, verbose: bool=False) -> dict:
+    """
+    Reads all cell values of the given workbook, copying the top-left cell value to all cells in each merged range.
+
+    This is the read-only counterpart of unmerge_cell_copy_top_value: the workbook is streamed in read-only mode 
+    and no Workbook object is modified, which makes it the preferred entry point when the values are only searched.
+
+    Args:
+        workbook_path (str): The path to the Excel workbook to process.
+        verbose (bool): If True, print debug information during processing. Default is False.
+
+    Returns:
+        dict: A dictionary with sheet titles as keys (in workbook order) and, as values, dictionaries mapping 
+        (row, column) to the cell values, sorted row by row.
+    """
+    wbook = load_workbook_ro(workbook_path)
+    sheets_values = {}
+    try:
+        for sheet in wbook.worksheets:
+            try:
+                values, merged_ranges = read_sheet_values(sheet)
+            except (ImportError, AttributeError, TypeError, KeyError):
+                # openpyxl internals have changed, see read_sheet_values
+                return _read_unmerged_values_full(workbook_path, verbose)
+            for cell_group in merged_ranges:
+                min_col, min_row, max_col, max_row = openpyxl.utils.range_boundaries(cell_group)
+                top_left_cell_value = values.get((min_row, min_col))
+                if verbose: print(cell_group, top_left_cell_value)
+                for row in range(min_row, max_row + 1):
+                    for col in range(min_col, max_col + 1):
+                        if top_left_cell_value is None: # empty cells are left out, as everywhere else
+                            values.pop((row, col), None)
+                        else:
+                            values[(row, col)] = top_left_cell_value
+            sheets_values[sheet.title] = dict(sorted(values.items()))
+    finally:
+        wbook.close()
+    return sheets_values
+
+def _read_unmerged_values_full(workbook_path: str, verbose: bool=False) -> dict:
+    # same result as read_unmerged_values, through a fully loaded workbook
+    wbook = unmerge_cell_copy_top_value(workbook_path, verbose=verbose)
+    return {sheet.title: {(row_idx, col_idx): value
+                          for row_idx, row in enumerate(sheet.iter_rows(values_only=True), start=1)
+                          for col_idx, value in enumerate(row, start=1) if value is not None}
+            for sheet in wbook.worksheets}
+
+def load_unmerged_values(workbook_path: str) -> dict:
+    """
+    Cached version of read_unmerged_values.
+
+    The workbook is parsed once and its values are reused by later calls, e.g. when extracting several courses 
+    or groups from the same schedule. The cache is invalidated when the file is modified.
+
+    Args:
+        workbook_path (str): The path to the Excel workbook to process.
+
+    Returns:
+        dict: The sheet values, as returned by read_unmerged_values. It is shared between calls and must not be modified.
+    """
+    return _load_unmerged_cached(workbook_path)[0]
+
+def _load_unmerged_cached(workbook_path: str):
+    # returns the sheet values and their token index (see build_cell_index)
+    return _load_unmerged(os.path.abspath(workbook_path), os.stat(workbook_path).st_mtime_ns)
+
+@functools.lru_cache(maxsize=8)
+def _load_unmerged(workbook_path: str, mtime_ns: int):
+    # mtime_ns is only part of the cache key
+    sheets_values = read_unmerged_values(workbook_path)
+    return sheets_values, build_cell_index(sheets_values)
+
 def search_string_in_workbook(wbook: "openpyxl workbook", search_string: str):
     """
     Searches for a specified string in all sheets of a workbook and extracts their coordinates along with sheet names and cell values.
 
     This function iterates through each worksheet in the provided openpyxl workbook, searches for the specified string in all cells,
-    and stores the results, including the sheet name, cell coordinate, and cell value.
+    and stores the results, including the sheet name, cell row and column indices, and cell value.
+    Prefer a read-only workbook (see load_workbook_ro) when the workbook is only searched.
 
     Args:
-        wbook (openpyxl.workbook.workbook.Workbook): The openpyxl workbook object to process.
+        wbook (openpyxl.workbook.workbook.Workbook): The openpyxl workbook object to process, possibly read-only.
         search_string (str): The string to search for in the workbook.
 
     Returns:
-        list: A list of lists, where each inner list contains the sheet name, cell coordinate, and cell value of a match.
+        list: A list of tuples containing the sheet name, row and column indices, and cell value of each match.
     """
     search_results=[]
     for sheet in wbook.worksheets:
@@ -142,20 +332,116 @@ def search_string_in_workbook(wbook: "openpyxl workbook", search_string: str):
     return search_results
 
 
-def search_string_in_worksheet(sheet, search_string):
+def search_string_in_worksheet(sheet, search_string: str):
+    """
+    Searches for a specified string in all cells of a worksheet.
+
+    Cells are iterated as raw values (no Cell objects are created) so that read-only worksheets are streamed.
+
+    Args:
+        sheet (openpyxl.worksheet.worksheet.Worksheet): The worksheet object to process, possibly read-only.
+        search_string (str): The string to search for in the worksheet.
+
+    Returns:
+        list: A list of tuples containing the sheet name, row and column indices, and cell value of each match.
+    """
     search_results=[]
-    for row in sheet.iter_rows():
-            for cell in row:
-                if cell.value and isinstance(cell.value, str):
-                    if search_string in cell.value:
-                        search_results.append([sheet.title,cell.coordinate, cell.value])
+    title=sheet.title
+    for row_idx, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+        for col_idx, value in enumerate(row, start=1):
+            if type(value) is str and search_string in value:
+                search_results.append((title, row_idx, col_idx, value))
+    return search_results
+
+def search_string_in_values(sheets_values: dict, search_string: str):
+    """
+    Searches for a specified string in the cell values read by read_unmerged_values.
+
+    Args:
+        sheets_values (dict): The sheet values, as returned by read_unmerged_values.
+        search_string (str): The string to search for.
+
+    Returns:
+        list: A list of tuples containing the sheet name, row and column indices, and cell value of each match.
+    """
+    search_results=[]
+    for title, values in sheets_values.items():
+        for (row_idx, col_idx), value in values.items():
+            if type(value) is str and search_string in value:
+                search_results.append((title, row_idx, col_idx, value))
     return search_results
 
+def iter_string_cells(wbook):
+    """
+    Iterates over the string cells of a workbook, yielding the sheet name, row and column indices, and cell value of each.
+
+    Args:
+        wbook: Either an openpyxl workbook (possibly read-only) or the sheet values returned by read_unmerged_values.
+
+    Yields:
+        tuple: The sheet name, row index, column index, and cell value.
+    """
+    if isinstance(wbook, dict):
+        for title, values in wbook.items():
+            for (row_idx, col_idx), value in values.items():
+                if type(value) is str:
+                    yield title, row_idx, col_idx, value
+    else:
+        for sheet in wbook.worksheets:
+            title=sheet.title
+            for row_idx, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+                for col_idx, value in enumerate(row, start=1):
+                    if type(value) is str:
+                        yield title, row_idx, col_idx, value
+
+def build_cell_index(wbook, needles=None) -> dict:
+    """
+    Indexes the string cells of a workbook in a single pass, so that many courses can be looked up without re-scanning it.
+
+    If needles are given, each needle is mapped to the cells containing it, exactly like search_string_in_workbook 
+    would find them (using an Aho-Corasick automaton when pyahocorasick is installed). Otherwise, each 
+    whitespace-delimited token of the cell values (e.g. a course short name) is mapped to the cells containing it.
+    The extract_schedule_* functions match course names as substrings, so the index passed to them must be built 
+    with needles (a token index misses e.g. 'ALGOS TD' for 'ALGO').
+
+    Args:
+        wbook: Either an openpyxl workbook (possibly read-only) or the sheet values returned by read_unmerged_values.
+        needles (iterable of str, optional): The strings to index. Defaults to None (token indexing).
+
+    Returns:
+        dict: A dictionary mapping each needle (or token) to a list of tuples containing the sheet name, 
+        row and column indices, and cell value of each match.
+    """
+    if needles is None:
+        index={}
+        for cell in iter_string_cells(wbook):
+            for token in dict.fromkeys(cell[3].split()):
+                index.setdefault(token, []).append(cell)
+        return index
+
+    needles=[needle for needle in dict.fromkeys(needles) if needle]
+    index={needle: [] for needle in needles}
+    if ahocorasick is not None and needles:
+        automaton=ahocorasick.Automaton()
+        for needle in needles:
+            automaton.add_word(needle, needle)
+        automaton.make_automaton()
+        for cell in iter_string_cells(wbook):
+            for needle in {needle for _, needle in automaton.iter(cell[3])}:
+                index[needle].append(cell)
+    else:
+        for cell in iter_string_cells(wbook):
+            for needle in needles:
+                if needle in cell[3]:
+                    index[needle].append(cell)
+    return index
+
 def extract_schedule_by_group_EI1(file_path : str, 
                                   course_name: str,
                                   group_name:str ,
                                   course_type: str, 
-                                  display_group_schedule: bool=False):
+                                  display_group_schedule: bool=False,
+                                  cell_index: dict=None):
     """
     Extracts the schedule of a specified course for a specified group from a given EI1 at ECN course schedule Excel file.
     
@@ -165,39 +451,55 @@ def extract_schedule_by_group_EI1(file_path : str,
     group_name (str): The name of the group to extract the schedule for.
     course_type (str): The type of course (e.g., 'TP', 'TD', 'CM').
     display_group_schedule (bool): If True, prints the schedule for the group. Defaults to False.
+    cell_index (dict): Index of the unmerged workbook values built with build_cell_index(values, needles=course_names), 
+        used to look up course_name instead of scanning the workbook. Useful when extracting many courses. 
+        The workbook is scanned as usual if course_name is not a key of the index. Defaults to None.
     
     Returns:
     list: A list of dictionaries containing the event details, with keys 'summary', 'dtstart', and 'dtend'.
     """
-    class_slots={"M1": ["08:00","10:00"],"M2": ["10:15","12:15"],"S1": ["13:45","15:45"],"S2": ["16:00","18:00"]}
-    tz = pytz.timezone('Europe/Paris')
 
     events=[]
-    wbook=unmerge_cell_copy_top_value(file_path)
+    sheets_values, token_index=_load_unmerged_cached(file_path)
     
-    #finding group row using column B
-    for row in wbook.worksheets[0].iter_rows(min_col=2, min_row=4, max_col=2, max_row=20):
-        for cell in row:
-            if cell.value and isinstance(cell.value, str):
-                if group_name in cell.value:
-                    groups_row=str(cell.row)
+    #finding group row using column B (first match in rows 4 to 20)
+    first_sheet_values=next(iter(sheets_values.values()))
+    for row in range(4, 21):
+        value=first_sheet_values.get((row, 2))
+        if type(value) is str and group_name in value:
+            groups_row=row
+            break
+    else:
+        raise ValueError(f"Group {group_name} not found in column B of {file_path}")
                     
-    occurences=search_string_in_workbook(wbook , search_string=course_name)
-    for occ in occurences:
-        if occ[1][1:] != groups_row or occ[2].split()[1][:2] not in course_type: continue # Beware very hacky test
-        # extracting date
-        date_pos=occ[1][0]+"3"
-        date=wbook[occ[0]][date_pos].value.split()[1] # dropping day name
-        slot_pos=occ[1][0]+"4"
-        slot=wbook[occ[0]][slot_pos].value.strip()
+    if cell_index is not None and course_name in cell_index:
+        occurences=cell_index[course_name]
+    elif course_name.split() == [course_name]:
+        # a single word is in a cell exactly when it is in one of its tokens, 
+        # so only the distinct tokens are scanned, matches are put back in row-major order
+        sheet_order={title: i for i, title in enumerate(sheets_values)}
+        occurences=sorted({cell for token, cells in token_index.items() if course_name in token for cell in cells},
+                          key=lambda cell: (sheet_order[cell[0]], cell[1], cell[2]))
+    else:
+        occurences=search_string_in_values(sheets_values, search_string=course_name)
+    for sheet, row, col, value in occurences:
+        if row != groups_row or value.split()[1][:2] not in course_type: continue # Beware very hacky test
+        values=sheets_values[sheet]
+        # extracting date (row 3) and slot (row 4) of the course column
+        date_cell=values.get((3, col))
+        date=date_cell.split()[1] # dropping day name
+        slot=values.get((4, col)).strip()
         
-        dtstart= tz.localize(datetime.strptime(date+" "+class_slots[slot][0],'%d/%m/%y %H:%M'))#converting to date object
-        dtend= tz.localize(datetime.strptime(date+" "+class_slots[slot][1],'%d/%m/%y %H:%M'))#converting to date object
+        day, month, year = map(int, date.split('/')) # dd/mm/yy date
+        day = datetime(2000+year, month, day)
+        start, end = _CLASS_SLOTS[slot]
+        dtstart= datetime.combine(day, start, tzinfo=_PARIS)#converting to date object
+        dtend= datetime.combine(day, end, tzinfo=_PARIS)#converting to date object
 
         if display_group_schedule: 
-            print(f"{wbook[occ[0]][date_pos].value.split()[0]:<8} {date} {slot} {occ[2]}\tGrp {group_name}")
+            print(f"{date_cell.split()[0]:<8} {date} {slot} {value}\tGrp {group_name}")
             
-        events.append({ 'summary': occ[2]+f" Grp {group_name}",
+        events.append({ 'summary': value+f" Grp {group_name}",
                         'dtstart': dtstart,
                         'dtend': dtend})
     return events
@@ -208,7 +510,8 @@ def extract_schedule_1sheet_format(file_path,
                                    line_slot="2", 
                                    group_name=None, 
                                    course_type=None, 
-                                   display_group_schedule=False):
+                                   display_group_schedule=False,
+                                   cell_index=None):
     """
     Extracts the schedule for a specific course from a single-sheet formatted course schedule Excel file.
     
@@ -220,6 +523,9 @@ def extract_schedule_1sheet_format(file_path,
         group_name (str, optional): The group name (not used in current implementation).
         course_type (str, optional): The type of the course (not used in current implementation).
         display_group_schedule (bool, optional): If True, displays the schedule for the group (default is False).
+        cell_index (dict, optional): Index of the unmerged workbook values built with 
+            build_cell_index(values, needles=course_names), used to look up course_name instead of scanning the workbook. 
+            The workbook is scanned as usual if course_name is not a key of the index (default is None).
 
     Returns:
         list: A list of dictionaries, each representing an event with keys 'summary', 'dtstart', and 'dtend'.
@@ -235,37 +541,35 @@ def extract_schedule_1sheet_format(file_path,
 
         For successive courses, you can add a blank space at the end of the course name in order to disentangle these.
     """
-    class_slots={"M1": [[ 8, 0],[10, 0]],
-                 "M2": [[10,15],[12,15]],
-                 "S1": [[13,45],[15,45]],
-                 "S2": [[16, 0],[18, 0]]}
-    tz = pytz.timezone('Europe/Paris')
     jour_to_dayshift={"Lundi":0, "Mardi":1, "Mercredi":2, "Jeudi":3, 'Vendredi':4}
 
     events=[]
-    wbook=unmerge_cell_copy_top_value(file_path)
+    sheets_values=load_unmerged_values(file_path)
+    date_col=column_index_from_string(date_column)
+    slot_row=int(line_slot)
                     
-    occurences=search_string_in_workbook(wbook, search_string=course_name)
-    for occ in occurences:
-        column_index="".join(filter(lambda x: x.isalpha(), occ[1])) #extracting column index (hack, there's probably a builtin way)
-        #if occ[2].split()[1][:2] not in course_type: continue # Beware very hacky test
+    if cell_index is not None and course_name in cell_index:
+        occurences=cell_index[course_name]
+    else:
+        occurences=search_string_in_values(sheets_values, search_string=course_name)
+    for sheet, row, col, value in occurences:
+        values=sheets_values[sheet]
+        #if value.split()[1][:2] not in course_type: continue # Beware very hacky test
         # extracting date
-        date_pos=date_column+"".join(filter(lambda x: x.isdigit(), occ[1]))
-        date=wbook[occ[0]][date_pos].value # getting monday date
-        # updating date using slot_pos
-        day_of_week=wbook[occ[0]][column_index+str(int(line_slot)-1)].value
+        date=values.get((row, date_col)) # getting monday date
+        # updating date using the day of week above the slot
+        day_of_week=values.get((slot_row-1, col))
         date=date+timedelta(days=jour_to_dayshift[day_of_week])
         
-        #print(date_pos,slot_pos)
-        slot_pos=column_index+line_slot
-        slot=wbook[occ[0]][slot_pos].value.strip()
-        dtstart= tz.localize(date.replace(hour=class_slots[slot][0][0],minute=class_slots[slot][0][1]))#converting to date object
-        dtend=   tz.localize(date.replace(hour=class_slots[slot][1][0],minute=class_slots[slot][1][1]))#converting to date object
+        slot=values.get((slot_row, col)).strip()
+        start, end = _CLASS_SLOTS[slot]
+        dtstart= datetime.combine(date, start, tzinfo=_PARIS)#converting to date object
+        dtend=   datetime.combine(date, end, tzinfo=_PARIS)#converting to date object
 
         if display_group_schedule: 
-            print(date.strftime("%a %d/%m/%y"),f"{slot} {clean_text(occ[2])}")
+            print(date.strftime("%a %d/%m/%y"),f"{slot} {clean_text(value)}")
             
-        events.append({ 'summary': clean_text(occ[2]),
+        events.append({ 'summary': clean_text(value),
                         'dtstart': dtstart,
                         'dtend': dtend})
     return events
@@ -274,45 +578,55 @@ def extract_schedule_1sheet_format(file_path,
 def find_conflicting_events(combined_df):
     """
     Identify conflicting events in a DataFrame and return a DataFrame containing these conflicts.
+
+    Every pair of overlapping events is reported, not only consecutive ones: events are sorted by start date 
+    and, for each event, the later events starting before it ends are found by binary search.
     
     Parameters:
     combined_df (pd.DataFrame): A DataFrame containing events with 'summary', 'dtstart', and 'dtend' columns.
     
     Returns:
     pd.DataFrame: A DataFrame containing conflicting events with details about both conflicting events.
+
+    Example:
+    A long event overlapping the next two events:
+    >>> events = pd.DataFrame({'summary': ['Long', 'Short1', 'Short2', 'Later'],
+    ...                        'dtstart': pd.to_datetime(['2024-09-02 08:00', '2024-09-02 09:00', '2024-09-02 11:00', '2024-09-02 13:00']),
+    ...                        'dtend': pd.to_datetime(['2024-09-02 12:00', '2024-09-02 10:00', '2024-09-02 12:00', '2024-09-02 14:00'])})
+    >>> find_conflicting_events(events)[['event1_summary', 'event2_summary']]
+      event1_summary event2_summary
+    0           Long         Short1
+    1           Long         Short2
     """
     
     # Ensure the DataFrame is sorted by the start date
     combined_df = combined_df.sort_values(by='dtstart').reset_index(drop=True)
     
-    # Create a list to store conflicting events
-    conflicts = []
-
-    # Iterate through the sorted DataFrame to identify conflicts
-    for i in range(1, len(combined_df)):
-        current_event = combined_df.iloc[i]
-        previous_event = combined_df.iloc[i - 1]
-
-        if current_event['dtstart'] < previous_event['dtend']:
-            conflicts.append({
-                'event1_summary': previous_event['summary'],
-                'event1_dtstart': previous_event['dtstart'],
-                'event1_dtend': previous_event['dtend'],
-                'event2_summary': current_event['summary'],
-                'event2_dtstart': current_event['dtstart'],
-                'event2_dtend': current_event['dtend']
-            })
-
-    # Convert the list of conflicts to a DataFrame
+    # Work on UTC datetime64 arrays (handles mixed time zones)
+    dtstart = pd.to_datetime(combined_df['dtstart'], utc=True).to_numpy()
+    dtend = pd.to_datetime(combined_df['dtend'], utc=True).to_numpy()
+
+    # Event i conflicts with the events i+1 .. last[i]-1, i.e. those starting before it ends
+    n_events = len(dtstart)
+    first = np.arange(n_events)
+    last = np.searchsorted(dtstart, dtend, side='left')
+    n_conflicts = np.maximum(last - first - 1, 0)
+    previous = np.repeat(first, n_conflicts)
+    offsets = np.arange(n_conflicts.sum()) - np.repeat(np.cumsum(n_conflicts) - n_conflicts, n_conflicts)
+    current = previous + 1 + offsets
+
+    # Gather both events of each conflict, keeping the original values
+    conflicts = {}
+    for prefix, idx in (('event1', previous), ('event2', current)):
+        for column in ('summary', 'dtstart', 'dtend'):
+            conflicts[f'{prefix}_{column}'] = combined_df[column].iloc[idx].reset_index(drop=True)
+
     conflicts_df = pd.DataFrame(conflicts)
     return conflicts_df
 
 def clean_text(text):
-    # Replace newline, tab, and carriage return with a space
-    text = text.replace('\n', ' ').replace('\t', ' ').replace('\r', ' ')
-    # Replace multiple spaces with a single space
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    # Replace any run of whitespace (including newline, tab, and carriage return) with a single space
+    return _WHITESPACE_RE.sub(' ', text).strip()
 
 def df_to_ics(df, output_file):
     """
@@ -323,25 +637,34 @@ def df_to_ics(df, output_file):
         - 'summary' (str): A brief description of the event.
         - 'dtstart' (datetime): The start datetime of the event.
         - 'dtend' (datetime): The end datetime of the event.
-        - 'location' (str, optional): The location of the event.
-        - 'description' (str, optional): A description of the event.
+        - 'location' (str, optional): The location of the event, left out if empty.
+        - 'description' (str, optional): A description of the event, left out if empty.
     output_file (str): The path to the output ICS file.
     """
     
     # Create a new calendar
     cal = Calendar()
     
-    # Set timezone to Europe/Paris (CEST)
-    tz = pytz.timezone('Europe/Paris')
-    
-    # Iterate through the DataFrame and add events to the calendar
-    for index, row in df.iterrows():
+    # Extract columns once instead of building a Series per row
+    # (missing optional columns and values are replaced by empty strings)
+    n_events = len(df)
+    summaries = df['summary'].tolist()
+    starts = df['dtstart'].tolist()
+    ends = df['dtend'].tolist()
+    locations = df['location'].fillna('').tolist() if 'location' in df.columns else [''] * n_events
+    descriptions = df['description'].fillna('').tolist() if 'description' in df.columns else [''] * n_events
+
+    # Iterate through the events and add them to the calendar
+    for summary, dtstart, dtend, location, description in zip(summaries, starts, ends, locations, descriptions):
         event = Event()
-        event.add('summary', row['summary'])
-        event.add('dtstart', row['dtstart'])
-        event.add('dtend', row['dtend'])
-        event.add('location', row.get('location', ''))
-        event.add('description', row.get('description', ''))
+        event.add('summary', summary)
+        event.add('dtstart', dtstart)
+        event.add('dtend', dtend)
+        # empty optional fields are left out of the event
+        if location:
+            event.add('location', location)
+        if description:
+            event.add('description', description)
         cal.add_component(event)
     
     # Write the calendar to the output file
@@ -23,13 +23,21 @@ Use LibreTranslate for now
 """
 import sys
 from pathlib import Path
-import json
+import functools
+import itertools
 import re
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 import requests
 
 import nbformat
 
+# single HTTP session, the connection to the LibreTranslate server is kept alive between requests
+_SESSION = requests.Session()
+
+# placeholder pattern (you can customize this)
+_CODE_BLOCK_RE = re.compile(r'(\s*```)(.*?)(\s*```)', re.DOTALL)
+
 def translate_CLI():
     """
     Command line parser for the translate_notebook function function.
@@ -86,11 +94,13 @@ def translate_CLI():
 
 def translate_notebook(notebook_path,
                        input_language="fr",
-                       output_language="en") -> None: 
+                       output_language="en",
+                       max_workers=8) -> None: 
     """
     Translates Markdown content in a Jupyter notebook while preserving code cells.
     
     Adds a warning message to the first cell and translates Markdown cells using LibreTranslate.
+    All Markdown cells are sent to the server in a single request, see `translate_texts`.
     
     Parameters
     ----------
@@ -99,6 +109,9 @@ def translate_notebook(notebook_path,
     
     output_language : str, optional
         The target language for translation. Default is 'en' (English).
+
+    max_workers : int, optional
+        Number of concurrent requests if the server cannot translate a batch of cells. Default is 8.
     
     Returns
     -------
@@ -116,13 +129,15 @@ def translate_notebook(notebook_path,
     nb.cells.insert(0, warning_cell)
     
     # Translate Markdown cells
-    for cell in nb.cells:
-        if cell.cell_type == 'markdown':
-            if 'original_content' not in cell.metadata:
-                cell.metadata['original_content'] = cell.source # Store the original content in metadata
-            original_text = cell.source
-            translated_text = translate_md(original_text,translator)
-            cell.source = translated_text
+    markdown_cells = [cell for cell in nb.cells if cell.cell_type == 'markdown']
+    for cell in markdown_cells:
+        if 'original_content' not in cell.metadata:
+            cell.metadata['original_content'] = cell.source # Store the original content in metadata
+    placeholders = [{} for _ in markdown_cells]
+    texts = [preprocess_text(cell.source, cell_placeholders) for cell, cell_placeholders in zip(markdown_cells, placeholders)]
+    translated_texts = translate_texts(texts, translator, max_workers)
+    for cell, translated_text, cell_placeholders in zip(markdown_cells, translated_texts, placeholders):
+        cell.source = postprocess_text(translated_text, cell_placeholders)
     
     # Save the translated notebook
     output_path = notebook_path.with_name(notebook_path.stem + f"_auto_{output_language}.ipynb")
@@ -131,6 +146,40 @@ def translate_notebook(notebook_path,
     
     print(f"Translated notebook saved to {output_path}")
 
+def translate_texts(texts, translator, max_workers=8):
+    """Translates a list of independent texts.
+
+    The whole list is first sent to the translator in a single call. If the translator 
+    cannot handle a batch (e.g. an older LibreTranslate server), the texts are translated 
+    one by one, with concurrent requests since translation time is spent waiting on the server.
+
+    Parameters
+    ----------
+    texts : list of str
+        The texts to be translated.
+
+    translator : function
+        A function that takes a text, or a list of texts, and returns its translation.
+
+    max_workers : int, optional
+        Number of concurrent translations when falling back to one text per call. Default is 8.
+
+    Returns
+    -------
+    list of str
+        The translated texts, in the same order.
+    """
+    if not texts:
+        return []
+    try:
+        translated_texts = translator(texts)
+        if isinstance(translated_texts, list) and len(translated_texts) == len(texts):
+            return translated_texts
+    except Exception:
+        pass # batch not supported, falling back to one request per text
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(translator, texts))
+
 def translate_md(source, translator):
     """Translates Markdown content while preserving formatting.
 
@@ -193,15 +242,13 @@ def translate_md(source, translator):
 def preprocess_text(text, placeholders):
     """function to extract and replace text that we do not want translated (specifically anything between ``` and ``` code blocks)
     """
-    # placeholder pattern (you can customize this)
-    pattern = r'\s*```(.*?)\s*```'
-    matches = re.findall(pattern, text, re.DOTALL)
-    for i, match in enumerate(matches):
-        placeholder = f'__PLACEHOLDER_{i}__'
-        placeholders[placeholder] = match
-        print(match)
-        text = text.replace(match, placeholder)
-    return text
+    counter = itertools.count()
+    def replace_block(match):
+        placeholder = f'__PLACEHOLDER_{next(counter)}__'
+        placeholders[placeholder] = match.group(2)
+        return match.group(1) + placeholder + match.group(3)
+    # single pass over the text, each code block gets its own placeholder
+    return _CODE_BLOCK_RE.sub(replace_block, text)
 
 # function to reinsert the original segments back into the text
 def postprocess_text(translated_text, placeholders):
@@ -210,6 +257,29 @@ def postprocess_text(translated_text, placeholders):
         #translated_text = translated_text.replace(placeholder, '[NO_TRANSLATE]' + original_text + '[/NO_TRANSLATE]')
     return translated_text
 
+@functools.lru_cache(maxsize=None)
+def check_libretranslate_server(url = 'http://localhost:5000/translate'):
+    """Checks once per URL that the LibreTranslate server is running.
+
+    Parameters
+    ----------
+    url : str, optional
+        The endpoint URL for the LibreTranslate API. Default is 'http://localhost:5000/translate'.
+
+    Raises
+    ------
+    Exception
+        If the LibreTranslate server is not running. Failed checks are not cached.
+    """
+    try:
+        response = _SESSION.get(url.replace("/translate", "/languages"), timeout=5)
+        if response.status_code != 200:
+            raise Exception("LibreTranslate server is not responding.")
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Failed to connect to LibreTranslate server: {e}"
+                        "Ensure that the LibreTranslate Docker server is running. "
+                        "Start the server with: `docker run -d -p 5000:5000 libretranslate/libretranslate` and try again.")
+
 # function to translate text using LibreTranslate API
 def libretranslate(text, 
                    url = 'http://localhost:5000/translate',
@@ -222,8 +292,8 @@ def libretranslate(text,
     
     Parameters
     ----------
-    text : str
-        The text to be translated.
+    text : str or list of str
+        The text to be translated. A list of texts is translated in a single request.
     
     url : str, optional
         The endpoint URL for the LibreTranslate API. Default is 'http://localhost:5000/translate'.
@@ -236,8 +306,8 @@ def libretranslate(text,
     
     Returns
     -------
-    str
-        The translated text returned by the LibreTranslate API.
+    str or list of str
+        The translated text returned by the LibreTranslate API, a list if `text` is a list.
     
     Raises
     ------
@@ -257,15 +327,8 @@ def libretranslate(text,
     'Hello, world'
     """
     
-    # Test if the LibreTranslate server is running
-    try:
-        response = requests.get(url.replace("/translate", "/languages"))
-        if response.status_code != 200:
-            raise Exception("LibreTranslate server is not responding.")
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to connect to LibreTranslate server: {e}"
-                        "Ensure that the LibreTranslate Docker server is running. "
-                        "Start the server with: `docker run -d -p 5000:5000 libretranslate/libretranslate` and try again.")
+    # Test if the LibreTranslate server is running (only on first call)
+    check_libretranslate_server(url)
 
     # build Json payload to send to LibreTranslate API
     payload = {
@@ -275,12 +338,14 @@ def libretranslate(text,
         "format": "html",
         "api_key": ""
     }
-    headers = {"Content-Type": "application/json"}
 
-    # send payload to LibreTranslate API
-    response = requests.post(url, data=json.dumps(payload), headers=headers)
+    # send payload to LibreTranslate API (a whole notebook may take a while to translate)
+    response = _SESSION.post(url, json=payload, timeout=300)
+    result = response.json()
+    if 'translatedText' not in result:
+        raise Exception(f"LibreTranslate error: {result.get('error', result)}")
 
-    return response.json()['translatedText']
+    return result['translatedText']
 
 # def load_Marian_translator():
 #     """Loading MarianMT model as a translator (microsoft owned)"""
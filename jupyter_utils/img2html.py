@@ -1,6 +1,213 @@
 import argparse
-import base64
+import collections
+import concurrent.futures
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import types
 import requests
+try:
+    from pybase64 import b64encode # optional, SIMD base64 encoding
+except ImportError:
+    from base64 import b64encode
+
+# read size when encoding, a multiple of 3 so that no base64 padding appears between chunks
+_CHUNK_SIZE = 57 * 1024
+
+# on-disk cache of downloaded media, revalidated with the server before reuse,
+# disabled by setting the JUPYTER_UTILS_NO_DISK_CACHE environment variable
+_CACHE_DIR = None if os.environ.get("JUPYTER_UTILS_NO_DISK_CACHE") else \
+    os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "jupyter_utils", "img2html")
+_DISK_CACHE_MAX_ITEM_BYTES = 4 * 1024**2 # larger media (e.g. videos) are not stored
+
+# in-memory cache of encoded media, bounded in bytes, larger media (e.g. videos) are not kept
+_MEMORY_CACHE = collections.OrderedDict()
+_MEMORY_CACHE_LOCK = threading.Lock()
+_MEMORY_CACHE_MAX_BYTES = 64 * 1024**2
+_MEMORY_CACHE_MAX_ITEM_BYTES = 4 * 1024**2
+_memory_cache_size = 0
+
+# image file extension -> subtype of the data URI media type, used when it can't be guessed
+_EXT2MIME = types.MappingProxyType({"png": "png", "jpg": "jpeg", "jpeg": "jpeg", "gif": "gif", "svg": "svg+xml"})
+
+# shared session so that connections are kept alive between downloads
+_SESSION = requests.Session()
+_SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32))
+_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32))
+
+def b64encode_chunks(chunks):
+    """
+    Base64-encode a stream of bytes chunks without loading the whole content in memory.
+
+    Chunks of any size are accepted: the few bytes that do not make a multiple of 3 
+    are carried over to the next chunk.
+
+    Parameters:
+    chunks (iterable of bytes): The content to encode.
+
+    Returns:
+    bytes: The base64-encoded content.
+
+    Example:
+    Chunk sizes that are not multiples of 3 give the same result as a one-shot encoding:
+    >>> import base64
+    >>> data = bytes(range(256)) * 4
+    >>> all(b64encode_chunks(data[i:i + size] for i in range(0, len(data), size)) == base64.b64encode(data)
+    ...     for size in (1, 2, 4, 5, 7, 100, 1000, 2000))
+    True
+    >>> b64encode_chunks([b"ab", b"", b"c", b"d"])
+    b'YWJjZA=='
+    """
+    encoded_parts = []
+    rest = b""
+    for chunk in chunks:
+        if rest:
+            chunk = rest + chunk
+        cut = len(chunk) - len(chunk) % 3
+        encoded_parts.append(b64encode(chunk[:cut]))
+        rest = chunk[cut:]
+    encoded_parts.append(b64encode(rest))
+    return b"".join(encoded_parts)
+
+def _memory_cache_get(key):
+    with _MEMORY_CACHE_LOCK:
+        entry = _MEMORY_CACHE.get(key)
+        if entry is None:
+            return None
+        _MEMORY_CACHE.move_to_end(key)
+        return entry[0]
+
+def _memory_cache_put(key, value, size):
+    # least recently used entries are dropped once the cache exceeds its byte budget
+    global _memory_cache_size
+    with _MEMORY_CACHE_LOCK:
+        if key in _MEMORY_CACHE:
+            _memory_cache_size -= _MEMORY_CACHE.pop(key)[1]
+        if size > _MEMORY_CACHE_MAX_ITEM_BYTES: # e.g. videos, not kept in memory
+            return
+        _MEMORY_CACHE[key] = (value, size)
+        _memory_cache_size += size
+        while _memory_cache_size > _MEMORY_CACHE_MAX_BYTES:
+            _memory_cache_size -= _MEMORY_CACHE.popitem(last=False)[1][1]
+
+def file_to_base64(path, mtime_ns=None):
+    """
+    Base64-encode a local file, with a bounded in-memory cache.
+
+    Parameters:
+    path (str): The path of the file.
+    mtime_ns (int): The modification time of the file, the cached content is only reused if it matches. 
+        Defaults to the current modification time of the file.
+
+    Returns:
+    bytes: The base64-encoded file content.
+    """
+    if mtime_ns is None:
+        mtime_ns = os.stat(path).st_mtime_ns
+    cached = _memory_cache_get(("file", path))
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    with open(path, "rb") as file:
+        encoded_bytes = b64encode_chunks(iter(lambda: file.read(_CHUNK_SIZE), b""))
+    # one entry per path, replaced when the file changes
+    _memory_cache_put(("file", path), (mtime_ns, encoded_bytes), len(encoded_bytes))
+    return encoded_bytes
+
+def url_to_base64(url, media_type):
+    """
+    Download a media file and base64-encode it, with a bounded in-memory cache and an on-disk cache.
+
+    Downloaded media are stored in $XDG_CACHE_HOME/jupyter_utils/img2html (~/.cache/jupyter_utils/img2html by default), 
+    with their ETag, Last-Modified and Content-Type headers in a small sidecar file, so that later downloads only 
+    require a cheap 304 (Not Modified) answer from the server. The stored content is only read when the server 
+    answers 304. Media larger than 4 MiB once encoded (e.g. videos) are not stored, and the on-disk cache is 
+    disabled altogether by setting the JUPYTER_UTILS_NO_DISK_CACHE environment variable.
+
+    Parameters:
+    url (str): The URL of the media.
+    media_type (str): The expected media type, e.g. "image" or "video".
+
+    Returns:
+    tuple: The base64-encoded media content (bytes) and its MIME type from the Content-Type header.
+
+    Raises:
+    ValueError: If the media cannot be fetched or is not of the expected type.
+    """
+    cached = _memory_cache_get(("url", url, media_type))
+    if cached is not None:
+        return cached
+
+    cache_path = _CACHE_DIR and os.path.join(_CACHE_DIR, hashlib.sha1(url.encode()).hexdigest())
+    headers = {}
+    headers_cached = None
+    if cache_path:
+        try:
+            os.stat(cache_path + ".b64") # no revalidation without the stored content
+            with open(cache_path + ".json") as cache_file:
+                headers_cached = json.load(cache_file)
+            if headers_cached.get("etag"):
+                headers["If-None-Match"] = headers_cached["etag"]
+            if headers_cached.get("last_modified"):
+                headers["If-Modified-Since"] = headers_cached["last_modified"]
+        except (OSError, ValueError):
+            headers_cached = None
+
+    with _SESSION.get(url, headers=headers, stream=True) as response:
+        if response.status_code == 304 and headers_cached:
+            content_type = headers_cached["content_type"]
+            try:
+                with open(cache_path + ".b64", "rb") as cache_file:
+                    encoded_bytes = cache_file.read()
+            except OSError:
+                raise ValueError(f"Cached content of {url} is missing")
+        else:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type")
+            if not (content_type and media_type in content_type):
+                raise ValueError(f"{url} is not of type {media_type}")
+            encoded_bytes = b64encode_chunks(response.iter_content(chunk_size=_CHUNK_SIZE))
+            if (cache_path and len(encoded_bytes) <= _DISK_CACHE_MAX_ITEM_BYTES
+                    and (response.headers.get("ETag") or response.headers.get("Last-Modified"))):
+                _write_cache(cache_path, encoded_bytes, {"etag": response.headers.get("ETag"),
+                                                         "last_modified": response.headers.get("Last-Modified"),
+                                                         "content_type": content_type})
+
+    if media_type not in content_type:
+        raise ValueError(f"{url} is not of type {media_type}")
+    result = encoded_bytes, content_type.partition(";")[0].strip()
+    _memory_cache_put(("url", url, media_type), result, len(encoded_bytes))
+    return result
+
+def _write_cache(cache_path, encoded_bytes, headers):
+    # the cache is best effort, e.g. the home directory may be read-only
+    # the content is written before the headers that validate it
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path + ".b64.tmp", "wb") as cache_file:
+            cache_file.write(encoded_bytes)
+        os.replace(cache_path + ".b64.tmp", cache_path + ".b64")
+        with open(cache_path + ".json.tmp", "w") as cache_file:
+            json.dump(headers, cache_file)
+        os.replace(cache_path + ".json.tmp", cache_path + ".json")
+    except OSError:
+        pass
+
+def _to_base64(source, media_type):
+    # (base64-encoded content as bytes, MIME type), or None if conversion fails
+    try:
+        if source.startswith(("http://", "https://")):
+            return url_to_base64(source, media_type)
+        else:
+            encoded_bytes = file_to_base64(os.path.abspath(source), os.stat(source).st_mtime_ns)
+    except (requests.RequestException, FileNotFoundError, ValueError):
+        return None
+    mime = mimetypes.guess_type(source)[0]
+    if not (mime and mime.startswith(media_type + "/")):
+        extention = source.rpartition(".")[2].lower()
+        mime = f"image/{_EXT2MIME.get(extention, 'png')}" if media_type == "image" else f"video/{extention}"
+    return encoded_bytes, mime
 
 def img_to_base64(source):
     """
@@ -8,6 +215,7 @@ def img_to_base64(source):
 
     This function accepts either a URL or a local file path of an image.
     It fetches the image content and encodes it in base64 format.
+    Results are cached, see file_to_base64 and url_to_base64.
 
     Parameters:
     source (str): The URL or local file path of the image.
@@ -15,24 +223,8 @@ def img_to_base64(source):
     Returns:
     str: The base64-encoded image content, or None if conversion fails.
     """
-    try:
-        if source.startswith("http://") or source.startswith("https://"):
-            response =  requests.get(source)
-            if response.status_code == 200:
-                content_type = response.headers.get("Content-Type")
-                if content_type and "image" in content_type:
-                    encoded_bytes = base64.b64encode(response.content)
-                    encoded_string = encoded_bytes.decode("utf-8")
-                    return encoded_string
-            else:
-                return None
-        else:
-            with open(source, "rb") as image_file:
-                encoded_bytes = base64.b64encode(image_file.read())
-                encoded_string = encoded_bytes.decode("utf-8")
-                return encoded_string
-    except (requests.RequestException, FileNotFoundError):
-        return None
+    encoded = _to_base64(source, "image")
+    return encoded[0].decode("ascii") if encoded else None
 
 def img2html_base64(source):
     """
@@ -47,24 +239,62 @@ def img2html_base64(source):
     Returns:
     str: The HTML img tag containing the base64-encoded image, or an error message.
     """
-    encoded_image = img_to_base64(source)
-    extention2html_tag={"png":"png", "jpg":"jpeg", "jpeg":"jpeg", "gif":"gif", "svg":"svg+xml"}
-    if encoded_image:
-        #recover the extention of the image
-        extention = source.split(".")[-1]
-        #convert the extention to the html tag
-        formatter=extention2html_tag[extention]
-        img_tag = f'<img src="data:image/{formatter};base64,{encoded_image}" alt="Image">'
+    encoded = _to_base64(source, "image")
+    if encoded and encoded[0]:
+        # the MIME type comes from the Content-Type header, or the extention of local files
+        encoded_image, mime = encoded
+        img_tag = f'<img src="data:{mime};base64,{encoded_image.decode("ascii")}" alt="Image">'
         return img_tag
     else:
         return "Error: Unable to fetch or convert the image."
 
+def img2html_base64_bytes(source):
+    """
+    Convert an image to a base64-encoded HTML img tag, as bytes.
+
+    Same as img2html_base64, but the base64 content is never decoded to str, which 
+    saves a copy of large images when the tag is written to a binary file.
+
+    Parameters:
+    source (str): The URL or local file path of the image.
+
+    Returns:
+    bytes: The HTML img tag containing the base64-encoded image, or an error message.
+    """
+    encoded = _to_base64(source, "image")
+    if encoded and encoded[0]:
+        encoded_image, mime = encoded
+        return b'<img src="data:%s;base64,%s" alt="Image">' % (mime.encode("ascii"), encoded_image)
+    else:
+        return b"Error: Unable to fetch or convert the image."
+
+def imgs_to_html_base64(sources, max_workers=16):
+    """
+    Convert several images to base64-encoded HTML img tags.
+
+    The images are fetched concurrently, which saves most of the network latency 
+    when many remote images are converted.
+
+    Parameters:
+    sources (list of str): The URLs or local file paths of the images.
+    max_workers (int): The maximum number of images fetched at the same time.
+
+    Returns:
+    list of str: The HTML img tags (or error messages), in the same order as sources.
+    """
+    sources = list(sources)
+    if len(sources) <= 1:
+        return [img2html_base64(source) for source in sources]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(img2html_base64, sources))
+
 def video_to_base64(source):
     """
     Convert an video from a URL or local file path to base64-encoded format.
 
     This function accepts either a URL or a local file path of an video.
     It fetches the video content and encodes it in base64 format.
+    Results are cached, see file_to_base64 and url_to_base64.
 
     Parameters:
     source (str): The URL or local file path of the video.
@@ -72,24 +302,8 @@ def video_to_base64(source):
     Returns:
     str: The base64-encoded video content, or None if conversion fails.
     """
-    try:
-        if source.startswith("http://") or source.startswith("https://"):
-            response = requests.get(source)
-            if response.status_code == 200:
-                content_type = response.headers.get("Content-Type")
-                if content_type and "video" in content_type:
-                    encoded_bytes = base64.b64encode(response.content)
-                    encoded_string = encoded_bytes.decode("utf-8")
-                    return encoded_string
-            else:
-                return None
-        else:
-            with open(source, "rb") as video_file:
-                encoded_bytes = base64.b64encode(video_file.read())
-                encoded_string = encoded_bytes.decode("utf-8")
-                return encoded_string
-    except (requests.RequestException, FileNotFoundError):
-        return None
+    encoded = _to_base64(source, "video")
+    return encoded[0].decode("ascii") if encoded else None
 
 def video2html_base64(source): 
     """
@@ -104,9 +318,10 @@ def video2html_base64(source):
     Returns:
     str: The HTML video tag containing the base64-encoded video, or an error message.
     """
-    encoded_video = video_to_base64(source)
-    if encoded_video:
-        video_tag = f'<video controls="controls" src="data:video/{source.split(".")[-1]};base64,{encoded_video}"></video>'
+    encoded = _to_base64(source, "video")
+    if encoded and encoded[0]:
+        encoded_video, mime = encoded
+        video_tag = f'<video controls="controls" src="data:{mime};base64,{encoded_video.decode("ascii")}"></video>'
         return video_tag
     else:
         return "Error: Unable to fetch or convert the video."
@@ -16,6 +16,9 @@ Functions
 - export_CLI(): 
     Command-line interface parser to handle the notebook export process.
     
+- read_notebook(notebook_path), write_notebook(notebook, output_path):
+    Read notebooks (parsed with orjson when it is installed) and write them in the nbformat layout.
+
 - remove_solution_cells(notebook_path, output_path):
     Removes cells tagged with "solution" from the notebook, creating a cleaned version for students.
 
@@ -40,17 +43,30 @@ Dependencies
 - argparse
 - subprocess
 - yaml
+- orjson (optional)
 """
 
 import os
 import subprocess
+import sys
 import argparse
+import functools
+from pathlib import Path
 
 from datetime import datetime
 from nbconvert import HTMLExporter, PDFExporter
 import yaml
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper # LibYAML bindings
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
 
 import nbformat
+from nbformat.v4.rwbase import rejoin_lines, strip_transient
+try:
+    import orjson # optional, faster notebook parsing
+except ImportError:
+    orjson = None
 
 
 
@@ -62,12 +78,17 @@ def export_CLI():
     $ python student_notebook_export.py notebook_with_solutions.ipynb --keep_output --export_HTML
     or if you have installed the package with pip:
     $ student_notebook_export notebook_with_solutions.ipynb --keep_output --export_HTML
+    Several notebooks can be exported at once:
+    $ student_notebook_export notebook1.ipynb notebook2.ipynb --export_PDF
     """
     parser = argparse.ArgumentParser(description="Create a student version of a Jupyter Notebook without solution cells.")
-    parser.add_argument("input",
-                        help="Path to the notebook with solutions")
+    parser.add_argument("input", nargs="+",
+                        help="Path to the notebook(s) with solutions")
     parser.add_argument("--keep_output",
                         help="Keep the output for solution code cells", action="store_true")
+    parser.add_argument("--export_ipynb",
+                        help="Write the student notebook (use --no-export_ipynb to only export HTML/PDF)",
+                        action=argparse.BooleanOptionalAction, default=True)
     parser.add_argument("--export_HTML",
                         help="Export the notebook to HTML to the same directory with the same name as the output notebook",
                         action=argparse.BooleanOptionalAction)
@@ -83,32 +104,83 @@ def export_CLI():
                         action="store_true")
 
     args = parser.parse_args()
-    output_path = "student_"+args.input
 
-    notebook_student_export(args.input, output_path,
-                            keep_output=args.keep_output,
-                            export_HTML=args.export_HTML, 
-                            export_YAML=args.export_YAML, 
-                            export_PDF=args.export_PDF,
-                            export_PDF_latex=args.export_PDF_latex)
+    # several notebooks in one run share the (costly to create) exporters
+    failed = []
+    for notebook_path in args.input:
+        output_path = "student_"+notebook_path
+
+        try:
+            notebook_student_export(notebook_path, output_path,
+                                    keep_output=args.keep_output,
+                                    export_ipynb=args.export_ipynb,
+                                    export_HTML=args.export_HTML, 
+                                    export_YAML=args.export_YAML, 
+                                    export_PDF=args.export_PDF,
+                                    export_PDF_latex=args.export_PDF_latex)
+        except (OSError, RuntimeError) as error: # one failed export does not stop the others
+            print(f"Export of {notebook_path} failed: {error}", file=sys.stderr)
+            failed.append(notebook_path)
+    if failed:
+        parser.exit(1)
+
+def read_notebook(notebook_path):
+    """
+    Read a notebook, parsing it with orjson when it is installed.
+
+    The orjson path skips the schema validation done by nbformat.read, notebooks
+    in another format than v4 still go through nbformat to be converted.
+    """
+    # a single binary read, the JSON parsers decode UTF-8 themselves
+    data = Path(notebook_path).read_bytes()
+    if orjson is None:
+        return nbformat.reads(data, as_version=4)
+
+    notebook_dict = orjson.loads(data)
+    if notebook_dict.get("nbformat") != 4:
+        return nbformat.reads(data, as_version=4)
+    # same in-memory form as nbformat.read: multi-line sources joined as strings
+    return strip_transient(rejoin_lines(nbformat.from_dict(notebook_dict)))
+
+def write_notebook(notebook, output_path):
+    """
+    Write a notebook with nbformat, so that the file layout (indentation, sources split
+    in lines) is the usual Jupyter one whether orjson is installed or not.
+    """
+    Path(output_path).write_bytes((nbformat.writes(notebook) + "\n").encode("utf-8"))
+
+@functools.lru_cache(maxsize=1)
+def _get_html_exporter():
+    # templates are loaded once and reused for every export
+    return HTMLExporter()
+
+@functools.lru_cache(maxsize=1)
+def _get_pdf_exporter():
+    return PDFExporter()
+
+def _filtered(cells, keep_output=False):
+    # yields the cells of the student version, solution cells are emptied or discarded
+    for cell in cells:
+        tags = cell.get("metadata", {}).get("tags") or ()
+        if "solution" in tags: 
+            if keep_output: # remove cell source but display output
+                cell.source = "" 
+                yield cell
+            # otherwise skip saving i.e. discard all the cell
+        else:
+            yield cell
 
 # first version
 def remove_solution_cells(notebook_path, output_path):
-    with open(notebook_path, 'r') as f:
-        notebook = nbformat.read(f, as_version=4)
-
-    cleaned_cells = []
-    for cell in notebook.cells:
-        if "solution" not in cell.get("metadata", {}).get("tags", []):
-            cleaned_cells.append(cell)
+    notebook = read_notebook(notebook_path)
 
-    notebook.cells = cleaned_cells
+    notebook.cells[:] = _filtered(notebook.cells)
 
-    with open(output_path, 'w') as f:
-        nbformat.write(notebook, f)
+    write_notebook(notebook, output_path)
 
 def notebook_student_export(notebook_path, output_path, 
                             keep_output=False,
+                            export_ipynb=True,
                             export_HTML=False,
                             export_YAML=False, 
                             export_PDF=False,
@@ -119,60 +191,61 @@ def notebook_student_export(notebook_path, output_path,
     notebook_path (str): Path to the original notebook with solutions.
         output_path (str): Path to the output notebook (without solutions).
         keep_output (bool): If True, retains the output of solution code cells in the student version.
+        export_ipynb (bool): If True, writes the student notebook to output_path.
         export_HTML (bool): If True, exports the notebook to HTML format in the same directory as the output notebook.
         export_YAML (bool): If True, exports the notebook's metadata or configuration to a YAML file.
-        export_PDF (bool): If True, converts the notebook to a PDF using wkhtmltopdf after exporting to HTML.
+        export_PDF (bool): If True, converts the notebook to a PDF using wkhtmltopdf, the HTML is piped to it.
         export_PDF_latex (bool): If True, converts the notebook directly to a PDF using LaTeX.
 
     Returns:
         None
     """
     # this code was generated with the help of LLMs on 14/02/2024
-    with open(notebook_path, 'r') as f:
-        notebook = nbformat.read(f, as_version=4)
+    notebook = read_notebook(notebook_path)
 
-    cleaned_cells = []
-    for i, cell in enumerate(notebook.cells):
-        if export_YAML and i==0:
-            YAML_update(cell)
-
-        if "solution" in cell.get("metadata", {}).get("tags", []): 
-            if keep_output: # remove cell source but display output
-                cell.source = "" 
-            else:
-                continue # skip saving i.e. discard all the cell
-                 
-        cleaned_cells.append(cell)
+    if export_YAML and notebook.cells:
+        YAML_update(notebook.cells[0])
 
-    notebook.cells = cleaned_cells
+    notebook.cells[:] = _filtered(notebook.cells, keep_output)
 
-    with open(output_path, 'w') as f:
-        nbformat.write(notebook, f)
+    if export_ipynb:
+        write_notebook(notebook, output_path)
     html_body = None
+    output_stem, _ = os.path.splitext(output_path)
+    html_output_path = output_stem + ".html"
+    pdf_output_path = output_stem + ".pdf"
 
     if export_HTML or export_PDF:
         # Convert notebook to HTML (if needed for HTML or PDF export)
-        html_exporter = HTMLExporter()
+        html_exporter = _get_html_exporter()
         html_body, _ = html_exporter.from_notebook_node(notebook)
-        html_output_path = os.path.splitext(output_path)[0] + ".html"
+        # encoded once for both the HTML file and wkhtmltopdf
+        html_bytes = html_body.encode("utf-8")
 
+    if export_HTML:
         # Save HTML output
-        with open(html_output_path, 'w') as f:
-            f.write(html_body)
+        Path(html_output_path).write_bytes(html_bytes)
 
-    pdf_output_path = os.path.splitext(output_path)[0] + ".pdf"
     if export_PDF:      
-        # Convert HTML to PDF using wkhtmltopdf
-        
-        subprocess.run(['wkhtmltopdf', html_output_path, pdf_output_path])
-        if not export_HTML:  # cleaning up temp HTML if not wanted
-            os.remove(html_output_path)
+        # Convert HTML to PDF using wkhtmltopdf, reading the HTML from stdin
+        # wkhtmltopdf exits with an error on network errors (e.g. offline CDN scripts) but still writes 
+        # the PDF, so only a missing PDF is an error. A PDF from an earlier export is removed first so that 
+        # it cannot be mistaken for a new one.
+        try:
+            os.remove(pdf_output_path)
+        except FileNotFoundError:
+            pass
+        result = subprocess.run(['wkhtmltopdf', '--quiet', '-', pdf_output_path], input=html_bytes)
+        if result.returncode and not os.path.exists(pdf_output_path):
+            raise RuntimeError(f"wkhtmltopdf failed to write {pdf_output_path} (exit code {result.returncode})")
 
     if export_PDF_latex :
         # Convert notebook to PDF
-        pdf_exporter = PDFExporter()
-        # making sure yaml formatting is stripped off
-        YAML_update(notebook.cells[0],True) 
+        pdf_exporter = _get_pdf_exporter()
+        # making sure yaml formatting is stripped off, only if there is a YAML header,
+        # i.e. a raw first cell or one written by export_YAML
+        if notebook.cells and (export_YAML or notebook.cells[0].cell_type == "raw"):
+            YAML_update(notebook.cells[0],True) 
         pdf_data, _ = pdf_exporter.from_notebook_node(notebook)
         # Write the PDF data to a file
         print("Using latex : base 64 images will not come through", pdf_output_path)
@@ -183,7 +256,9 @@ def notebook_student_export(notebook_path, output_path,
 def YAML_update(cell,to_pdf=False):
     if cell.cell_type=="raw": 
         #reading existing data only if raw format
-        metadata=yaml.safe_load(cell.source)
+        metadata=yaml.load(cell.source, Loader=SafeLoader)
+        if not isinstance(metadata, dict): # raw cell that is not a YAML header, e.g. LaTeX
+            return
     else:
         metadata={"author": "Lucas Lestandi",
                 "email": "lucas.lestandi@ec-nantes.fr",
@@ -197,6 +272,6 @@ def YAML_update(cell,to_pdf=False):
 
     metadata["date"]=academic_year
     if to_pdf:
-        cell.source=f"---\n{yaml.dump(metadata, sort_keys=False)}---"
+        cell.source=f"---\n{yaml.dump(metadata, Dumper=SafeDumper, sort_keys=False)}---"
     else:
-        cell.source=f"```yaml\n---\n{yaml.dump(metadata, sort_keys=False)}---\n```"
\ No newline at end of file
+        cell.source=f"```yaml\n---\n{yaml.dump(metadata, Dumper=SafeDumper, sort_keys=False)}---\n```"
\ No newline at end of file